@@ -0,0 +1,103 @@
+"""
+Per-event parsing and index maintenance done by InMemoryEventStore.add.
+
+Kept free of app imports and fully annotated so it can be compiled with
+mypyc (`mypyc app/_ingest.py`); the resulting extension module is picked
+up automatically in place of this file.
+"""
+
+import sys
+from bisect import bisect_right, insort
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Any, Dict, List, Tuple
+
+
+def _parse_iso_utc(s: str) -> datetime:
+    """
+    Parse an ISO8601 string ending in Z into a UTC datetime.
+    Example: "2025-05-30T12:34:56Z"
+    """
+    return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+
+if sys.version_info >= (3, 11):
+    def _iso_to_epoch(s: str) -> int:
+        """Convert an ISO8601 timestamp such as "2025-05-30T12:34:56Z" to UNIX epoch seconds."""
+        # fromisoformat reads the trailing Z natively from 3.11
+        return int(datetime.fromisoformat(s).timestamp())
+else:
+    def _iso_to_epoch(s: str) -> int:
+        """Convert an ISO8601 timestamp such as "2025-05-30T12:34:56Z" to UNIX epoch seconds."""
+        return int(_parse_iso_utc(s).timestamp())
+
+
+def _is_pr_opened(event: Dict[str, Any]) -> bool:
+    """True for a PullRequestEvent whose payload action is "opened"."""
+    return event.get('type') == 'PullRequestEvent' and (event.get('payload') or {}).get('action') == 'opened'
+
+
+def _heatmap_cell(ts: int) -> Tuple[int, int]:
+    """(weekday, hour) of an epoch in UTC, Mon=0; 1970-01-01 was a Thursday."""
+    return (ts // 86400 + 3) % 7, (ts // 3600) % 24
+
+
+def _event_ts(event: Dict[str, Any]) -> int:
+    """
+    Return the event creation time as UNIX epoch seconds, cached on the event under '_ts_epoch'.
+    Only for events fetched on the GitHub fallback paths; stored events keep
+    their epoch in the store's ts column and are never modified.
+    """
+    ts = event.get('_ts_epoch')
+    if ts is None:
+        ts = _iso_to_epoch(event['created_at'])
+        event['_ts_epoch'] = ts
+    return ts
+
+
+def _ingest_fields(event: Dict[str, Any]) -> Tuple[str, int, str, bool]:
+    """Everything add() needs from an event: (lowercased repo, epoch, type, opened-PR flag)."""
+    name = event['repo']['name']
+    if not isinstance(name, str):
+        raise TypeError(f"repo name must be a string, got {type(name).__name__}")
+    # A JSON null type counts as 'Unknown', same as a missing one
+    raw_type = event.get('type')
+    ev_type = raw_type if isinstance(raw_type, str) else 'Unknown'
+    return name.lower(), _iso_to_epoch(event['created_at']), ev_type, _is_pr_opened(event)
+
+
+def _insert_event(
+    ts_list: List[int],
+    events: List[Dict[str, Any]],
+    flags: List[bool],
+    prefix: List[Dict[str, int]],
+    global_events: Any,
+    event: Dict[str, Any],
+    ts: int,
+    ev_type: str,
+    is_pr: bool,
+) -> None:
+    """
+    Insert one event into a repo's sorted columns, its prefix type counts and
+    the global (ts, event) deque, keeping every index ordered by ts.
+    """
+    # Callers add each newest-first GitHub page in reverse, so this is usually the end of the list
+    if not ts_list or ts >= ts_list[-1]:
+        idx = len(ts_list)
+    else:
+        idx = bisect_right(ts_list, ts)
+    ts_list.insert(idx, ts)
+    events.insert(idx, event)
+    flags.insert(idx, is_pr)
+
+    before = prefix[idx]
+    counts = dict(before)
+    counts[ev_type] = before.get(ev_type, 0) + 1
+    prefix.insert(idx + 1, counts)
+    for later in prefix[idx + 2:]:
+        later[ev_type] = later.get(ev_type, 0) + 1
+
+    if not global_events or ts >= global_events[-1][0]:
+        global_events.append((ts, event))
+    else:
+        insort(global_events, (ts, event), key=itemgetter(0))
@@ -1,26 +1,68 @@
-import io
+import asyncio
 import json
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List
-from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-import aiohttp
-import matplotlib.pyplot as plt
+import numpy as np
+import orjson
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from fastapi import FastAPI, HTTPException, Query, status
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, ORJSONResponse, StreamingResponse
 
 from .storage import store
+from ._ingest import _event_ts, _is_pr_opened
 from .metrics import avg_pr_interval, counts_by_type
-from .collectors import attach_to, GITHUB_EVENTS_URL, INTERESTING, _headers, fetch_repo_events
+from .collectors import attach_to, GITHUB_EVENTS_URL, INTERESTING, _headers, _read_json, fetch_repo_events
 
-def _parse_iso(s: str) -> datetime:
+# Split long scatter paths into chunks so Agg doesn't rasterize them in one go
+matplotlib.rcParams["agg.path.chunksize"] = 10000
+
+class _Sink:
+    """Write-only file object that collects PNG chunks for a single join."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, b) -> int:
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+def _viz_features(ts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Parse an ISO8601 string ending in Z into a UTC datetime.
-    Example: "2025-05-30T12:34:56Z"
+    Given sorted epoch seconds, return (intervals in hours, hour of day, weekday)
+    with integer math on the whole array. Weekday is Mon=0; 1970-01-01 was a Thursday.
     """
-    return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc)
+    intervals = np.diff(ts) / 3600
+    hours = (ts % 86400) // 3600
+    weekdays = (ts // 86400 + 3) % 7
+    return intervals, hours, weekdays
+
+
+async def _stream_json_array(event_lists: List[List[Dict]], batch: int = 500) -> AsyncIterator[bytes]:
+    """Yield a JSON array of all events in `event_lists`, encoded `batch` events per chunk."""
+    yield b"["
+    sep = b""
+    parts: List[bytes] = []
+    for events in event_lists:
+        # Copy before encoding, the collector may append or evict between chunks
+        for ev in events[:]:
+            parts.append(orjson.dumps(ev))
+            if len(parts) >= batch:
+                yield sep + b",".join(parts)
+                sep = b","
+                parts = []
+    if parts:
+        yield sep + b",".join(parts)
+    yield b"]"
 
-app = FastAPI(title="GitHub Events Monitor")
+
+app = FastAPI(title="GitHub Events Monitor", default_response_class=ORJSONResponse)
 attach_to(app)
 
 
@@ -29,41 +71,24 @@ attach_to(app)
 # ----------------------------------------
 
 @app.get("/metrics/{owner}/{repo}/pr-interval", response_model=Dict[str, float])
-def get_pr_interval(owner: str, repo: str):
+async def get_pr_interval(owner: str, repo: str):
     """
     Calculate the average time between pull requests for a given repository.
     Returns the average interval in seconds.
     """
     repo_name = f"{owner}/{repo}".lower()
     
-    # Get all PR events for the repo
-    events = store.get_events_for_repo(repo_name)
-    
-    # Filter for PR open events and sort by timestamp
-    pr_events = [
-        e for e in events
-        if e["type"] == "PullRequestEvent" and e.get("payload", {}).get("action") == "opened"
-    ]
+    # Sorted timestamps of the repo's PR open events
+    ts = store.get_pr_opened_ts(repo_name)
     
-    if len(pr_events) < 2:
+    if len(ts) < 2:
         raise HTTPException(
             status_code=404,
             detail="Need at least 2 PRs to calculate average interval"
         )
     
-    # Sort by timestamp
-    pr_events.sort(key=lambda e: e["created_at"])
-    
-    # Calculate intervals between successive PRs
-    intervals = []
-    for i in range(1, len(pr_events)):
-        prev_time = _parse_iso(pr_events[i-1]["created_at"])
-        curr_time = _parse_iso(pr_events[i]["created_at"])
-        interval = (curr_time - prev_time).total_seconds()
-        intervals.append(interval)
-    
-    # Calculate average interval
-    avg_interval = sum(intervals) / len(intervals)
+    # Average interval between successive PRs
+    avg_interval = float(np.diff(ts).mean())
     return {"average_seconds": avg_interval}
 
 
@@ -85,86 +110,46 @@ async def get_event_counts(
         
         # If we don't have any events, try fetching directly from GitHub
         if not counts:
-            events = await fetch_repo_events(owner, repo)
+            events = await fetch_repo_events(owner, repo, app.state.http)
             # Filter by time
-            since = datetime.now(timezone.utc) - timedelta(minutes=offset)
+            since = (datetime.now(timezone.utc) - timedelta(minutes=offset)).timestamp()
             filtered_events = [
                 e for e in events
-                if _parse_iso(e["created_at"]) >= since
+                if _event_ts(e) >= since
             ]
             # Count by type
-            counts = defaultdict(int)
-            for event in filtered_events:
-                counts[event["type"]] += 1
-            counts = dict(counts)
+            counts = counts_by_type(filtered_events)
     else:
         # Get events from all repositories
-        all_events = store.recent(offset)
-        counts = defaultdict(int)
-        for event in all_events:
-            counts[event["type"]] += 1
-        counts = dict(counts)
+        counts = counts_by_type(store.recent(offset))
     
     return counts
 
 
-@app.get("/viz/{owner}/{repo}/pr-metrics.png")
-async def visualize_pr_metrics(
-    owner: str,
-    repo: str,
-    days: int = Query(30, ge=1, le=365, description="Days to analyze")
-):
+def _render_png(ts: np.ndarray, heatmap: Optional[np.ndarray], owner: str, repo: str) -> bytes:
     """
-    Generate a visualization of PR metrics including:
-    1. PR creation timeline
-    2. PR interval distribution
-    3. PR creation time heatmap (hour of day vs day of week)
+    Draw the PR metrics figure for sorted PR epoch seconds and return it as PNG bytes.
+    Uses only its own Figure, so it is safe to run in a worker thread.
+    `heatmap` is the (weekday, hour) grid; None bins it from `ts`.
     """
-    repo_name = f"{owner}/{repo}".lower()
-    since = datetime.now(timezone.utc) - timedelta(days=days)
+    intervals, hours, weekdays = _viz_features(ts)
+    if heatmap is None:
+        heatmap = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
     
-    # First try stored events
-    events = store.get_events_for_repo(repo_name, since=since)
-    
-    # If we don't have enough events, fetch directly from GitHub
-    if not events:
-        events = await fetch_repo_events(owner, repo)
-        # Filter by time
-        events = [
-            e for e in events
-            if _parse_iso(e["created_at"]) >= since
-        ]
-    
-    # Filter for PR events
-    pr_events = [
-        e for e in events
-        if e["type"] == "PullRequestEvent" and e.get("payload", {}).get("action") == "opened"
-    ]
-    
-    if not pr_events:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No PRs found in the last {days} days"
-        )
-    
-    # Sort events by timestamp
-    pr_events.sort(key=lambda e: e["created_at"])
-    timestamps = [_parse_iso(e["created_at"]) for e in pr_events]
-    
-    # Create visualization
-    fig = plt.figure(figsize=(15, 10))
+    # Create visualization on a private Agg canvas, outside pyplot's global state
+    fig = Figure(figsize=(15, 10))
+    FigureCanvasAgg(fig)
     
     # 1. PR Timeline
-    ax1 = plt.subplot(2, 2, 1)
-    ax1.scatter(timestamps, range(len(timestamps)), alpha=0.6)
+    ax1 = fig.add_subplot(2, 2, 1)
+    ax1.scatter(ts.astype("datetime64[s]"), np.arange(len(ts)), alpha=0.6)
     ax1.set_ylabel("PR Index")
     ax1.set_title(f"PR Timeline for {owner}/{repo}")
     ax1.grid(True)
     
     # 2. Interval Distribution
-    intervals = [(b - a).total_seconds()/3600 for a, b in zip(timestamps, timestamps[1:])]
-    if intervals:
-        ax2 = plt.subplot(2, 2, 2)
+    if len(intervals):
+        ax2 = fig.add_subplot(2, 2, 2)
         ax2.hist(intervals, bins=20, alpha=0.7)
         ax2.set_xlabel("Hours between PRs")
         ax2.set_ylabel("Frequency")
@@ -172,35 +157,75 @@ async def visualize_pr_metrics(
         ax2.grid(True)
         
         # Add mean and median lines
-        mean_interval = sum(intervals) / len(intervals)
-        median_interval = sorted(intervals)[len(intervals)//2]
+        mean_interval = intervals.mean()
+        median_interval = np.sort(intervals)[len(intervals)//2]
         ax2.axvline(mean_interval, color='r', linestyle='--', label=f'Mean: {mean_interval:.1f}h')
         ax2.axvline(median_interval, color='g', linestyle='--', label=f'Median: {median_interval:.1f}h')
         ax2.legend()
     
     # 3. Time of Day Analysis
-    ax3 = plt.subplot(2, 1, 2)
-    hours = [t.hour for t in timestamps]
-    weekdays = [t.weekday() for t in timestamps]
+    ax3 = fig.add_subplot(2, 1, 2)
     
-    # Create 2D histogram
-    plt.hist2d(hours, weekdays, bins=(24, 7), cmap='YlOrRd')
-    plt.colorbar(label='Number of PRs')
+    # Draw the (weekday, hour) grid
+    image = ax3.imshow(heatmap, aspect='auto', cmap='YlOrRd', origin='lower', extent=[0, 24, -0.5, 6.5])
+    fig.colorbar(image, ax=ax3, label='Number of PRs')
     ax3.set_xlabel('Hour of Day (UTC)')
     ax3.set_ylabel('Day of Week')
     ax3.set_title('PR Creation Time Heatmap')
     ax3.set_yticks(range(7))
     ax3.set_yticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Convert to PNG
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-    buf.seek(0)
-    plt.close()
+    buf = _Sink()
+    # Low zlib level: a slightly larger PNG in exchange for faster encoding
+    fig.savefig(buf, format='png', dpi=100, bbox_inches='tight', pil_kwargs={"compress_level": 1})
+    
+    return buf.getvalue()
+
+
+@app.get("/viz/{owner}/{repo}/pr-metrics.png")
+async def visualize_pr_metrics(
+    owner: str,
+    repo: str,
+    days: int = Query(30, ge=1, le=365, description="Days to analyze")
+):
+    """
+    Generate a visualization of PR metrics including:
+    1. PR creation timeline
+    2. PR interval distribution
+    3. PR creation time heatmap (hour of day vs day of week)
+    """
+    repo_name = f"{owner}/{repo}".lower()
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    
+    # First try stored events
+    from_store = store.count_events(repo_name, since=since) > 0
+    if from_store:
+        ts = store.get_pr_opened_ts(repo_name, since=since)
+    else:
+        # If we don't have any events, fetch directly from GitHub and filter by time
+        events = await fetch_repo_events(owner, repo, app.state.http)
+        cutoff = since.timestamp()
+        ts = np.fromiter(
+            (_event_ts(e) for e in events if _is_pr_opened(e) and _event_ts(e) >= cutoff),
+            dtype=np.int64
+        )
+        ts.sort()
+    
+    if not len(ts):
+        raise HTTPException(
+            status_code=404,
+            detail=f"No PRs found in the last {days} days"
+        )
+    
+    # Use the grid kept by the store when the window covers everything it holds
+    heatmap = store.get_pr_heatmap(repo_name, since) if from_store else None
     
-    return Response(content=buf.getvalue(), media_type="image/png")
+    # Matplotlib work is blocking, render off the event loop
+    png = await asyncio.to_thread(_render_png, ts, heatmap, owner, repo)
+    return Response(content=png, media_type="image/png")
 
 
 # -------------------------------------------------
@@ -220,12 +245,11 @@ async def list_public_events(
     PullRequestEvent, and IssuesEvent. Runs in real‐time (no Dynamo involved).
     """
     url = f"{GITHUB_EVENTS_URL}?per_page={per_page}&page={page}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=_headers(), timeout=30) as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                raise HTTPException(status_code=resp.status, detail=text)
-            events = await resp.json()
+    async with app.state.http.get(url, headers=_headers(), timeout=30) as resp:
+        if resp.status != 200:
+            text = await resp.text()
+            raise HTTPException(status_code=resp.status, detail=text)
+        events = await _read_json(resp)
 
     # Filter to our three event types
     filtered = [ev for ev in events if ev.get("type") in INTERESTING]
@@ -236,7 +260,7 @@ async def list_public_events(
     "/events",
     status_code=status.HTTP_200_OK
 )
-def list_all_events():
+async def list_all_events():
     """
     Return every GitHub event JSON currently stored in DynamoDB,
     regardless of repo. WARNING: full table scan, can be slow if large. this works only if class DynamoEventStore in storage is uncommented and used.
@@ -247,25 +271,25 @@ def list_all_events():
     i used my own credentials and hardcoded them in the code.
     potential usage for the future would be passing the events into the sqs queue or sns topic
     and lambda would be triggered to process the events and store them in the dynamoDB table or else.
+    The JSON array is streamed in chunks, so the full list is never built in memory.
     """
     try:
-        all_evts = store.get_all_events()
+        event_lists = store.get_event_lists()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch all events: {e}"
         )
-    return all_evts
+    return StreamingResponse(_stream_json_array(event_lists), media_type="application/json")
 
 
 # Health check endpoint
 @app.get("/health")
 def health_check():
     """Check if the service is running and collecting events."""
-    total_events = len(store.get_all_events())
     return {
         "status": "healthy",
-        "total_events_collected": total_events,
+        "total_events_collected": store.total_events,
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
@@ -7,10 +7,13 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import List, Dict, Any
+import time
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping
 from datetime import datetime, timezone, timedelta
 
 import aiohttp
+import orjson
 from fastapi import HTTPException
 
 from .config import settings
@@ -21,18 +24,39 @@ __all__ = ['attach_to', 'fetch_repo_events']
 log = logging.getLogger(__name__)
 GITHUB_EVENTS_URL = "https://api.github.com/events"
 REPO_EVENTS_URL = "https://api.github.com/repos/{owner}/{repo}/events"
-INTERESTING = {"WatchEvent", "PullRequestEvent", "IssuesEvent"}
+EVICT_INTERVAL = 60  # seconds between retention sweeps of the store
+INTERESTING = frozenset({"WatchEvent", "PullRequestEvent", "IssuesEvent"})
 
-def _headers() -> dict[str, str]:
+# Request headers are fixed for the process lifetime, so build them once
+_HEADERS_NO_AUTH: Mapping[str, str] = MappingProxyType({
+    "Accept": "application/vnd.github+json",
+    "User-Agent": "github-metrics-demo",
+    "X-GitHub-Api-Version": "2022-11-28"
+})
+_HEADERS_AUTH: Mapping[str, str] = MappingProxyType({
+    **_HEADERS_NO_AUTH,
+    "Authorization": f"Bearer {settings.github_token}"
+})
+
+def _headers() -> Mapping[str, str]:
     """Get headers for GitHub API requests with proper auth."""
-    hdrs = {
-        "Accept": "application/vnd.github+json",
-        "User-Agent": "github-metrics-demo",
-        "X-GitHub-Api-Version": "2022-11-28"
-    }
-    if settings.github_token:
-        hdrs["Authorization"] = f"Bearer {settings.github_token}"
-    return hdrs
+    return _HEADERS_AUTH if settings.github_token else _HEADERS_NO_AUTH
+
+async def _read_json(resp: aiohttp.ClientResponse) -> Any:
+    """
+    Decode a JSON response with orjson straight from the body bytes.
+    Raises aiohttp.ContentTypeError for non-JSON responses, like resp.json() does.
+    """
+    ctype = resp.content_type
+    if ctype != "application/json" and not (ctype.startswith("application/") and ctype.endswith("+json")):
+        raise aiohttp.ContentTypeError(
+            resp.request_info,
+            resp.history,
+            status=resp.status,
+            message=f"Attempt to decode JSON with unexpected mimetype: {ctype}",
+            headers=resp.headers,
+        )
+    return orjson.loads(await resp.read())
 
 async def _handle_rate_limit(resp: aiohttp.ClientResponse) -> None:
     """Handle GitHub API rate limiting."""
@@ -71,7 +95,7 @@ async def _fetch_page(
                 poll_interval = int(resp.headers.get('X-Poll-Interval', 60))
                 log.debug(f"Poll interval: {poll_interval} seconds")
                 
-                return await resp.json()
+                return await _read_json(resp)
                 
         except asyncio.TimeoutError:
             log.error(f"Timeout fetching {url}")
@@ -80,7 +104,16 @@ async def _fetch_page(
             log.error(f"Error fetching {url}: {e}")
             return []
 
-async def fetch_repo_events(owner: str, repo: str) -> List[Dict[str, Any]]:
+def _new_session() -> aiohttp.ClientSession:
+    """Create the shared keep-alive session used for all GitHub requests."""
+    connector = aiohttp.TCPConnector(limit=50, ttl_dns_cache=300, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector)
+
+async def fetch_repo_events(
+    owner: str,
+    repo: str,
+    session: aiohttp.ClientSession
+) -> List[Dict[str, Any]]:
     """
     Fetch events specifically for a repository.
     This helps get more accurate data for a specific repo.
@@ -88,18 +121,19 @@ async def fetch_repo_events(owner: str, repo: str) -> List[Dict[str, Any]]:
     url = REPO_EVENTS_URL.format(owner=owner, repo=repo)
     all_events = []
     
-    async with aiohttp.ClientSession() as session:
-        # GitHub returns max 300 events fetch 3 pages of 100
-        for page in range(1, 4):
-            events = await _fetch_page(session, url, page=page)
-            if not events:
-                break
-            all_events.extend(events)
-            await asyncio.sleep(1)
+    # GitHub returns max 300 events, fetch the 3 pages of 100 concurrently
+    pages = await asyncio.gather(
+        *(_fetch_page(session, url, page=page) for page in range(1, 4)),
+        return_exceptions=True
+    )
+    for events in pages:
+        if isinstance(events, BaseException) or not events:
+            break
+        all_events.extend(events)
             
     return all_events
 
-async def _collector_loop():
+async def _collector_loop(session: aiohttp.ClientSession):
     """
     Main collector loop that runs indefinitely.
     Fetches both global events and specific repository events.
@@ -108,43 +142,61 @@ async def _collector_loop():
     
     while True:
         try:
-            async with aiohttp.ClientSession() as session:
-                # Fetch global public events
-                events = await _fetch_page(session, GITHUB_EVENTS_URL)
-                log.info(f"Fetched {len(events)} public events")
-                
-                # Store interesting events
-                stored_count = 0
-                for event in events:
-                    if event.get("type") in INTERESTING:
-                        try:
-                            store.add(event)
-                            stored_count += 1
-                        except Exception as e:
-                            log.error(f"Failed to store event: {e}")
-                
-                log.info(f"Stored {stored_count} interesting events")
-                
-                # Wait for next poll interval
-                await asyncio.sleep(settings.poll_interval)
+            # Fetch global public events
+            events = await _fetch_page(session, GITHUB_EVENTS_URL)
+            log.info(f"Fetched {len(events)} public events")
+            
+            # Store interesting events, pages are newest-first so walk them oldest-first
+            stored_count = 0
+            for event in reversed(events):
+                if event.get("type") in INTERESTING:
+                    try:
+                        store.add(event)
+                        stored_count += 1
+                    except Exception as e:
+                        log.error(f"Failed to store event: {e}")
+            
+            log.info(f"Stored {stored_count} interesting events")
+            
+            # Wait for next poll interval
+            await asyncio.sleep(settings.poll_interval)
                 
         except Exception as e:
             log.error(f"Collector error: {e}")
             await asyncio.sleep(settings.poll_interval)
 
+async def _evictor_loop():
+    """Periodically drop events older than settings.max_minutes from the store."""
+    while True:
+        await asyncio.sleep(EVICT_INTERVAL)
+        try:
+            cutoff = time.time() - settings.max_minutes * 60
+            removed = store.evict_older_than(cutoff)
+            if removed:
+                log.info(f"Evicted {removed} events older than {settings.max_minutes} minutes")
+        except Exception as e:
+            log.error(f"Evictor error: {e}")
+
 def attach_to(app):
-    """Attach the collector to a FastAPI application."""
+    """Attach the collector and the shared HTTP session to a FastAPI application."""
     @app.on_event("startup")
     async def start_collector():
-        app.state.collector_task = asyncio.create_task(_collector_loop())
+        app.state.http = _new_session()
+        app.state.collector_task = asyncio.create_task(_collector_loop(app.state.http))
+        app.state.evictor_task = asyncio.create_task(_evictor_loop())
         log.info("Collector task started")
 
     @app.on_event("shutdown")
     async def stop_collector():
-        if hasattr(app.state, 'collector_task'):
-            app.state.collector_task.cancel()
+        for name in ('collector_task', 'evictor_task'):
+            task = getattr(app.state, name, None)
+            if task is None:
+                continue
+            task.cancel()
             try:
-                await app.state.collector_task
+                await task
             except asyncio.CancelledError:
                 pass
-            log.info("Collector task stopped")
+        log.info("Collector task stopped")
+        if hasattr(app.state, 'http'):
+            await app.state.http.close()
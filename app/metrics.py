@@ -1,13 +1,8 @@
-from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 
-def _parse_iso(s: str) -> datetime:
-    """
-    Parse an ISO8601 string ending in Z into a UTC datetime.
-    Example: "2025-05-30T12:34:56Z"
-    """
-    # Replace trailing 'Z' with '+00:00' so fromisoformat can parse it
-    return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc)
+import numpy as np
+
+from ._ingest import _iso_to_epoch
 
 def avg_pr_interval(pr_events: List[Dict[str, Any]]) -> Optional[float]:
     """
@@ -18,20 +13,12 @@ def avg_pr_interval(pr_events: List[Dict[str, Any]]) -> Optional[float]:
     if len(pr_events) < 2:
         return None
 
-    # Extract and sort the timestamps
-    timestamps = sorted(_parse_iso(ev["created_at"]) for ev in pr_events)
-
-    # Compute successive deltas
-    deltas = []
-    for i in range(1, len(timestamps)):
-        delta = (timestamps[i] - timestamps[i-1]).total_seconds()
-        if delta >= 0:
-            deltas.append(delta)
-
-    if not deltas:
-        return None
+    # Extract and sort the timestamps as epoch seconds
+    ts = np.fromiter((_iso_to_epoch(ev["created_at"]) for ev in pr_events), dtype=np.int64, count=len(pr_events))
+    ts.sort()
 
-    return sum(deltas) / len(deltas)
+    # Mean of successive deltas
+    return float(np.diff(ts).mean())
 
 def counts_by_type(events: List[Dict[str, Any]]) -> Dict[str, int]:
     """
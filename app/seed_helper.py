@@ -1,11 +1,13 @@
 import aiohttp
-from app.storage import store, _parse_iso_utc
+from app.collectors import _read_json
+from app.storage import store
 
 async def seed_repo(repo: str, session: aiohttp.ClientSession, n: int = 100):
     url = f"https://api.github.com/repos/{repo}/events?per_page={n}"
     async with session.get(url, timeout=30) as resp:
         resp.raise_for_status()
-        events = await resp.json()
-    for ev in events:
+        events = await _read_json(resp)
+    # GitHub returns newest-first, add oldest-first so the store appends
+    for ev in reversed(events):
         store.add(ev)
     print(f"[seed] added {len(events)} events for {repo}")
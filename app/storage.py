@@ -1,12 +1,17 @@
 # storage.py
 from datetime import datetime, timedelta, timezone
 import time
+from bisect import bisect_left
+from itertools import compress
 import boto3
+import numpy as np
 from boto3.dynamodb.conditions import Key, Attr
-from collections import defaultdict
-from typing import List, Dict, Any, Optional
+from collections import defaultdict, deque
+from typing import List, Dict, Any, Optional, Deque, Tuple
 
 from .config import settings
+from . import _ingest
+from ._ingest import _heatmap_cell, _ingest_fields, _insert_event
 
 # class DynamoEventStore:
 #     def __init__(self):
@@ -170,15 +175,33 @@ from .config import settings
 
 class InMemoryEventStore:
     def __init__(self):
-        # Store events in a dictionary: repo -> list of events
+        # Store events in a dictionary: repo -> list of events sorted by time
         self.events: Dict[str, List[Dict]] = defaultdict(list)
+        # Parallel columns per repo (same order as events), so scans never touch
+        # the raw payloads: sorted epoch seconds (the bisect key) and opened-PR flag
+        self.ts: Dict[str, List[int]] = defaultdict(list)
+        self.is_pr_opened: Dict[str, List[bool]] = defaultdict(list)
+        # Cumulative per-type counts: entry i covers the first i events of the repo
+        self.type_counts_prefix: Dict[str, List[Dict[str, int]]] = defaultdict(lambda: [{}])
+        # Number of events across all repos
+        self._total: int = 0
+        # (epoch, event) for every repo in time order, so recent() only walks the window
+        self._global: Deque[Tuple[int, Dict]] = deque()
+        # Opened PRs per (weekday, hour) for each repo, read directly by the viz heatmap
+        self.heatmap: Dict[str, np.ndarray] = defaultdict(lambda: np.zeros((7, 24), dtype=np.int32))
         
     def add(self, event: dict) -> None:
         """Store a GitHub event in memory."""
         try:
-            repo = event['repo']['name'].lower()
-            # Add event to the repository's list
-            self.events[repo].append(event)
+            # Parse the timestamp once, all read paths compare epoch ints
+            repo, ts, ev_type, is_pr = _ingest_fields(event)
+            _insert_event(
+                self.ts[repo], self.events[repo], self.is_pr_opened[repo],
+                self.type_counts_prefix[repo], self._global, event, ts, ev_type, is_pr,
+            )
+            if is_pr:
+                self.heatmap[repo][_heatmap_cell(ts)] += 1
+            self._total += 1
             print(f"[storage] Stored event for {repo}, type: {event.get('type')}")
         except Exception as e:
             print(f"[storage] Error storing event: {e}")
@@ -197,20 +220,47 @@ class InMemoryEventStore:
         events = self.events.get(repo, [])
         
         if since:
-            # Filter events by timestamp if since is provided
-            filtered_events = []
-            for event in events:
-                event_time = datetime.fromisoformat(
-                    event['created_at'].replace('Z', '+00:00')
-                ).astimezone(timezone.utc)
-                if event_time >= since:
-                    filtered_events.append(event)
+            # Events are sorted, so the window is a suffix of the list
+            idx = bisect_left(self.ts.get(repo, []), since.timestamp())
+            filtered_events = events[idx:]
             print(f"[storage] Found {len(filtered_events)} events since {since}")
             return filtered_events
         
         print(f"[storage] Found {len(events)} total events")
         return events
 
+    def count_events(self, repo: str, since: Optional[datetime] = None) -> int:
+        """Number of stored events for a repository, optionally since a time."""
+        ts_list = self.ts.get(repo.lower(), [])
+        return len(ts_list) - (bisect_left(ts_list, since.timestamp()) if since else 0)
+
+    def get_pr_opened_ts(self, repo: str, since: Optional[datetime] = None) -> np.ndarray:
+        """Sorted epoch seconds of the repo's opened PRs, read from the columns only."""
+        repo = repo.lower()
+        ts_list = self.ts.get(repo)
+        if not ts_list:
+            return np.empty(0, dtype=np.int64)
+        idx = bisect_left(ts_list, since.timestamp()) if since else 0
+        return np.fromiter(compress(ts_list[idx:], self.is_pr_opened[repo][idx:]), dtype=np.int64)
+
+    def get_pr_heatmap(self, repo: str, since: Optional[datetime] = None) -> Optional[np.ndarray]:
+        """
+        Copy of the repo's opened-PR (weekday, hour) counts, or None when `since`
+        cuts into the retained events and the grid would overcount.
+        """
+        repo = repo.lower()
+        ts_list = self.ts.get(repo)
+        if not ts_list or (since and since.timestamp() > ts_list[0]):
+            return None
+        grid = self.heatmap.get(repo)
+        # Repos without opened PRs never get a grid allocated
+        return grid.copy() if grid is not None else np.zeros((7, 24), dtype=np.int32)
+
+    @property
+    def total_events(self) -> int:
+        """Number of stored events across all repositories."""
+        return self._total
+
     def get_all_events(self) -> List[Dict]:
         """Get all stored events."""
         all_events = []
@@ -218,32 +268,74 @@ class InMemoryEventStore:
             all_events.extend(events)
         return all_events
 
+    def get_event_lists(self) -> List[List[Dict]]:
+        """The live per-repo event lists, without building one combined copy."""
+        return list(self.events.values())
+
     def get_events_by_type(
         self,
         repo: str,
         minutes: int
     ) -> Dict[str, int]:
         """Get event counts by type for the last N minutes."""
+        repo = repo.lower()
+        prefix = self.type_counts_prefix.get(repo)
+        if prefix is None:
+            return {}
         since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
-        events = self.get_events_for_repo(repo, since=since)
-        
-        counts = defaultdict(int)
-        for event in events:
-            counts[event['type']] += 1
-        return dict(counts)
+        idx = bisect_left(self.ts[repo], since.timestamp())
+
+        # Counts for the window are the totals minus the prefix before it
+        base = prefix[idx]
+        counts = {}
+        for ev_type, total in prefix[-1].items():
+            n = total - base.get(ev_type, 0)
+            if n:
+                counts[ev_type] = n
+        return counts
 
     def recent(self, since_minutes: int) -> List[Dict]:
         """Get all events from the last N minutes across all repositories."""
-        cutoff = datetime.now(timezone.utc) - timedelta(minutes=since_minutes)
+        cutoff = (datetime.now(timezone.utc) - timedelta(minutes=since_minutes)).timestamp()
+        # Walk back from the newest event and stop at the first one outside the window
         recent_events = []
-        for events in self.events.values():
-            for event in events:
-                event_time = datetime.fromisoformat(
-                    event['created_at'].replace('Z', '+00:00')
-                ).astimezone(timezone.utc)
-                if event_time >= cutoff:
-                    recent_events.append(event)
+        for ts, event in reversed(self._global):
+            if ts < cutoff:
+                break
+            recent_events.append(event)
+        recent_events.reverse()
         return recent_events
 
+    def evict_older_than(self, cutoff: float) -> int:
+        """Drop every event created before the `cutoff` epoch. Returns how many were removed."""
+        removed = 0
+        for repo in list(self.ts):
+            ts_list = self.ts[repo]
+            idx = bisect_left(ts_list, cutoff)
+            if not idx:
+                continue
+            removed += idx
+            if idx == len(ts_list):
+                for columns in (self.ts, self.events, self.is_pr_opened, self.type_counts_prefix):
+                    del columns[repo]
+                self.heatmap.pop(repo, None)
+                continue
+            heatmap = self.heatmap.get(repo)
+            if heatmap is not None:
+                for ts in compress(ts_list[:idx], self.is_pr_opened[repo]):
+                    heatmap[_heatmap_cell(ts)] -= 1
+            for columns in (self.ts, self.events, self.is_pr_opened):
+                del columns[repo][:idx]
+            # The new first entry is the baseline for the retained events
+            del self.type_counts_prefix[repo][:idx]
+
+        while self._global and self._global[0][0] < cutoff:
+            self._global.popleft()
+        self._total -= removed
+        return removed
+
+# A mypyc build of _ingest shadows the .py, so say which one is running
+print(f"[storage] Using ingest helpers from {_ingest.__file__}")
+
 # Create a single instance to be used throughout the app
 store = InMemoryEventStore()
@@ -0,0 +1,85 @@
+import calendar
+import importlib.util
+import random
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+import app._ingest
+
+# app._ingest is the mypyc extension when one is built; also check the source it came from
+_spec = importlib.util.spec_from_file_location("_ingest_pure", Path(app._ingest.__file__).with_name("_ingest.py"))
+_pure = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_pure)
+
+FMT = "%Y-%m-%dT%H:%M:%SZ"
+
+MALFORMED = [
+    "2025-05-3 T12:34:56Z",
+    "+025-05-30T12:34:56Z",
+    "2025-05-30T-1:34:56Z",
+    "2025/05/30T12:34:56Z",
+    "2025-05-30T12:34:5 Z",
+    "not a timestamp",
+    "",
+]
+
+
+@pytest.fixture(params=[app._ingest, _pure], ids=["imported", "pure"])
+def ingest(request):
+    return request.param
+
+
+def test_round_trips_random_timestamps(ingest):
+    rng = random.Random(0)
+    # Both sides of the epoch, out past 2100
+    for ts in [rng.randint(-2_000_000_000, 4_200_000_000) for _ in range(5000)] + [-1, 0, 1]:
+        s = datetime.fromtimestamp(ts, timezone.utc).strftime(FMT)
+        assert ingest._iso_to_epoch(s) == ts, s
+
+
+@pytest.mark.parametrize("s", [
+    "2024-02-29T00:00:00Z",
+    "2000-02-29T12:00:00Z",
+    "2025-04-30T23:59:59Z",
+    "2025-12-31T23:59:59Z",
+    "1969-12-31T23:59:59Z",
+])
+def test_accepts_calendar_limits(ingest, s):
+    assert ingest._iso_to_epoch(s) == calendar.timegm(datetime.strptime(s, FMT).timetuple())
+
+
+@pytest.mark.parametrize("s", [
+    "1900-02-29T00:00:00Z",
+    "2023-02-29T00:00:00Z",
+    "2025-04-31T00:00:00Z",
+    "2025-13-01T00:00:00Z",
+    "2025-00-10T00:00:00Z",
+    "2025-05-00T00:00:00Z",
+    "2025-05-30T24:00:00Z",
+    "2025-05-30T12:60:00Z",
+    "2025-05-30T12:34:60Z",
+] + MALFORMED)
+def test_rejects_what_parse_iso_utc_rejects(ingest, s):
+    with pytest.raises(ValueError):
+        ingest._parse_iso_utc(s)
+    with pytest.raises(ValueError):
+        ingest._iso_to_epoch(s)
+
+
+def test_agrees_with_parse_iso_utc_on_mutated_input(ingest):
+    rng = random.Random(1)
+    # No Z: as the date/time separator fromisoformat reads it from 3.11, replace("Z", "+00:00") mangles it
+    chars = "0123456789-:T +/"
+    for _ in range(5000):
+        s = list(datetime.fromtimestamp(rng.randint(0, 2_000_000_000), timezone.utc).strftime(FMT))
+        s[rng.randrange(len(s))] = rng.choice(chars)
+        s = "".join(s)
+        try:
+            expected = int(ingest._parse_iso_utc(s).timestamp())
+        except ValueError:
+            with pytest.raises(ValueError):
+                ingest._iso_to_epoch(s)
+        else:
+            assert ingest._iso_to_epoch(s) == expected, s
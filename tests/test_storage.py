@@ -0,0 +1,140 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.storage import InMemoryEventStore
+
+REPOS = ["Foo/Bar", "a/b", "x/y"]
+TYPES = ["WatchEvent", "PullRequestEvent", "IssuesEvent"]
+
+
+def _epoch(event):
+    return int(datetime.fromisoformat(event["created_at"].replace("Z", "+00:00")).timestamp())
+
+
+def _make_events(now, n=300, seed=0):
+    """Random events over the last ~10 hours, shuffled so add() sees them out of order."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        # Half-minute offset keeps every event away from whole-minute window edges
+        created = now - timedelta(minutes=rng.randint(0, 600), seconds=30)
+        ev_type = rng.choice(TYPES)
+        payload = {"action": rng.choice(["opened", "opened", "closed"])} if ev_type != "WatchEvent" else {}
+        events.append({
+            "id": str(i),
+            "type": ev_type,
+            "repo": {"name": rng.choice(REPOS)},
+            "created_at": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "payload": payload,
+        })
+    return events
+
+
+def _naive_counts(events, repo, cutoff):
+    counts = {}
+    for e in events:
+        if e["repo"]["name"].lower() == repo and _epoch(e) >= cutoff:
+            counts[e["type"]] = counts.get(e["type"], 0) + 1
+    return counts
+
+
+def _naive_pr_ts(events, repo, cutoff):
+    return sorted(
+        _epoch(e) for e in events
+        if e["repo"]["name"].lower() == repo and _epoch(e) >= cutoff
+        and e["type"] == "PullRequestEvent" and e["payload"].get("action") == "opened"
+    )
+
+
+def _naive_heatmap(events, repo):
+    grid = np.zeros((7, 24), dtype=np.int32)
+    for ts in _naive_pr_ts(events, repo, float("-inf")):
+        t = datetime.fromtimestamp(ts, timezone.utc)
+        grid[t.weekday(), t.hour] += 1
+    return grid
+
+
+def _check_store(store, events, now):
+    assert store.total_events == len(events)
+    for minutes in (0, 5, 60, 250, 599, 10_000):
+        cutoff = (now - timedelta(minutes=minutes)).timestamp()
+        assert len(store.recent(minutes)) == sum(1 for e in events if _epoch(e) >= cutoff)
+        for name in REPOS:
+            repo = name.lower()
+            assert store.get_events_by_type(repo, minutes) == _naive_counts(events, repo, cutoff)
+            since = now - timedelta(minutes=minutes)
+            assert store.get_pr_opened_ts(repo, since).tolist() == _naive_pr_ts(events, repo, cutoff)
+    for name in REPOS:
+        repo = name.lower()
+        assert store.get_pr_opened_ts(repo).tolist() == _naive_pr_ts(events, repo, float("-inf"))
+        repo_ts = [_epoch(e) for e in events if e["repo"]["name"].lower() == repo]
+        if not repo_ts:
+            assert store.get_pr_heatmap(repo) is None
+            continue
+        assert (store.get_pr_heatmap(repo) == _naive_heatmap(events, repo)).all()
+        # A window starting after the oldest retained event can't use the full grid
+        assert store.get_pr_heatmap(repo, datetime.fromtimestamp(min(repo_ts) + 1, timezone.utc)) is None
+
+
+@pytest.fixture
+def now():
+    return datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def loaded(now):
+    store = InMemoryEventStore()
+    events = _make_events(now)
+    for e in events:
+        store.add(e)
+    return store, events
+
+
+def test_indexes_match_naive_recomputation(loaded, now):
+    store, events = loaded
+    _check_store(store, events, now)
+
+
+@pytest.mark.parametrize("minutes", [100, 300, 599])
+def test_indexes_match_after_eviction(loaded, now, minutes):
+    store, events = loaded
+    cutoff = (now - timedelta(minutes=minutes)).timestamp()
+    kept = [e for e in events if _epoch(e) >= cutoff]
+
+    assert store.evict_older_than(cutoff) == len(events) - len(kept)
+    _check_store(store, kept, now)
+
+    # Adding after a partial eviction keeps the rebased prefix counts exact
+    extra = _make_events(now, n=50, seed=1)
+    for e in extra:
+        store.add(e)
+    _check_store(store, kept + extra, now)
+
+
+def test_evicting_everything_empties_the_store(loaded, now):
+    store, events = loaded
+    assert store.evict_older_than(now.timestamp() + 1) == len(events)
+    assert store.total_events == 0
+    assert store.recent(10_000) == []
+    assert store.get_events_by_type("foo/bar", 10_000) == {}
+    assert len(store.get_pr_opened_ts("foo/bar")) == 0
+    assert not store.events and not store.ts
+
+
+def test_heatmap_grid_only_allocated_for_repos_with_opened_prs(now):
+    store = InMemoryEventStore()
+    for minutes in (120, 10):
+        store.add({
+            "type": "WatchEvent",
+            "repo": {"name": "Only/Stars"},
+            "created_at": (now - timedelta(minutes=minutes)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "payload": {},
+        })
+
+    assert (store.get_pr_heatmap("only/stars") == 0).all()
+    # Partial eviction takes the decrement path for the repo
+    assert store.evict_older_than((now - timedelta(minutes=60)).timestamp()) == 1
+    assert "only/stars" not in store.heatmap